@@ -4,12 +4,19 @@ Cert-Manager Validation Script for Azure Workload Identity
 Validates cert-manager installation and certificate issuance capabilities
 """
 
-import subprocess
-import json
 import time
 import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
-import yaml
+import orjson
+import requests
+from kubernetes import client, config, watch
+from kubernetes.client.rest import ApiException
+from azure.core.exceptions import AzureError
+from azure.core.pipeline.transport import RequestsTransport
+from azure.identity import DefaultAzureCredential
+from azure.mgmt.dns import DnsManagementClient
 
 class CertManagerValidator:
     def __init__(self):
@@ -17,68 +24,120 @@ class CertManagerValidator:
         self.dns_zone = "davidmarkgardiner.co.uk"
         self.cluster = "uk8s-tsshared-weu-gt025-int-prod"
         self.client_id = "1317ba0a-60d3-4f05-b41e-483ed1d6acb3"
+        self.subscription_id = "133d5755-4074-4d6e-ad38-eb2a6ad12903"
+        self.dns_resource_group = "dns"
         self.results = []
+        self._results_lock = threading.Lock()
+        self._output = threading.local()
         
-    def run_kubectl(self, args, check=True):
-        """Run kubectl command and return result."""
-        cmd = ["kubectl"] + args
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=check)
-            return result
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Command failed: {' '.join(cmd)}")
-            print(f"   Error: {e.stderr}")
-            return None
+        # One long-lived API client so every check reuses the same
+        # keep-alive connection pool instead of forking kubectl per call
+        config.load_kube_config()
+        self.api = client.ApiClient()
+        self.core_v1 = client.CoreV1Api(self.api)
+        self.custom_objects = client.CustomObjectsApi(self.api)
+        self.apiextensions_v1 = client.ApiextensionsV1Api(self.api)
+        
+        # Azure SDK client kept for the validator's lifetime so repeat calls
+        # share one credential (and its cached token) and one pooled HTTPS
+        # session instead of cold-starting `az` per call
+        self._cred = DefaultAzureCredential()
+        self._azure_session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=8, pool_maxsize=16)
+        self._azure_session.mount("https://", adapter)
+        self._dns = DnsManagementClient(
+            self._cred, self.subscription_id, transport=self.azure_transport()
+        )
+    
+    def azure_transport(self):
+        """Build an SDK transport on the shared session, which the client does not own."""
+        return RequestsTransport(session=self._azure_session, session_owner=False)
     
-    def run_az(self, args, check=True):
-        """Run Azure CLI command and return result."""
-        cmd = ["az"] + args
+    def prewarm_azure_token(self):
+        """Acquire the ARM token up front so it is cached before the checks run."""
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=check)
-            return result
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Azure CLI command failed: {' '.join(cmd)}")
-            print(f"   Error: {e.stderr}")
-            return None
+            self._cred.get_token("https://management.azure.com/.default")
+        except AzureError as e:
+            print(f"⚠️  Could not acquire Azure token: {e}")
+    
+    def close(self):
+        """Release the Kubernetes and Azure client connection pools."""
+        self.api.close()
+        self._dns.close()
+        self._azure_session.close()
+        self._cred.close()
+    
+    def log(self, message=""):
+        """Print message, or buffer it when running inside a concurrent check."""
+        lines = getattr(self._output, "lines", None)
+        if lines is None:
+            print(message)
+        else:
+            lines.append(message)
+    
+    def record_result(self, check_name, success):
+        """Record a check result; safe to call from worker threads."""
+        with self._results_lock:
+            self.results.append((check_name, success))
+    
+    def list_items(self, list_func, *args, **kwargs):
+        """Call a list endpoint and parse the raw body with orjson.
+        
+        Skipping the client's model deserialization avoids building an
+        object graph for every item in large lists.
+        """
+        response = list_func(*args, _preload_content=False, **kwargs)
+        return orjson.loads(response.data).get("items", [])
+    
+    def get_cert_manager_pods(self):
+        """List cert-manager pods; resourceVersion=0 serves it from the apiserver cache."""
+        return self.list_items(
+            self.core_v1.list_namespaced_pod,
+            self.namespace,
+            label_selector="app.kubernetes.io/instance=cert-manager",
+            resource_version="0",
+        )
     
     def check_cert_manager_pods(self):
         """Verify cert-manager pods are running."""
-        print("🔍 Checking cert-manager pods...")
+        self.log("🔍 Checking cert-manager pods...")
         
-        result = self.run_kubectl(["get", "pods", "-n", self.namespace, "-o", "json"])
-        if not result:
-            return False
-            
         try:
-            data = json.loads(result.stdout)
-            pods = data.get("items", [])
+            pods = self.get_cert_manager_pods()
             
-            expected_pods = ["cert-manager", "cert-manager-webhook", "cert-manager-cainjector"]
-            running_pods = []
+            expected_pods = {"cert-manager", "cert-manager-webhook", "cert-manager-cainjector"}
+            # Longest prefix first so webhook/cainjector pods are not claimed by "cert-manager"
+            prefixes = sorted(expected_pods, key=len, reverse=True)
+            running_pods = set()
             
             for pod in pods:
                 name = pod["metadata"]["name"]
                 status = pod["status"]["phase"]
                 
-                for expected in expected_pods:
-                    if expected in name:
-                        if status == "Running":
-                            print(f"✅ {expected} is running")
-                            running_pods.append(expected)
-                        else:
-                            print(f"❌ {expected} status: {status}")
+                matched = next((p for p in prefixes if name.startswith(p)), None)
+                if matched is None:
+                    continue
+                if status == "Running":
+                    self.log(f"✅ {matched} is running")
+                    running_pods.add(matched)
+                else:
+                    self.log(f"❌ {matched} status: {status}")
+            
+            missing = expected_pods - running_pods
+            if missing:
+                self.log(f"❌ No running pods for: {sorted(missing)}")
             
-            success = len(running_pods) >= 3
-            self.results.append(("Cert-Manager Pods", success))
+            success = not missing
+            self.record_result("Cert-Manager Pods", success)
             return success
             
-        except json.JSONDecodeError:
-            print(f"❌ Failed to parse pod status")
+        except ApiException as e:
+            self.log(f"❌ Failed to list pods in {self.namespace}: {e.reason}")
             return False
     
     def check_crds_installed(self):
         """Verify cert-manager CRDs are installed."""
-        print("🔍 Checking cert-manager CRDs...")
+        self.log("🔍 Checking cert-manager CRDs...")
         
         required_crds = [
             "certificates.cert-manager.io",
@@ -89,36 +148,39 @@ class CertManagerValidator:
             "orders.acme.cert-manager.io"
         ]
         
-        result = self.run_kubectl(["get", "crd"])
-        if not result:
+        try:
+            crds = self.list_items(
+                self.apiextensions_v1.list_custom_resource_definition, resource_version="0"
+            )
+        except ApiException as e:
+            self.log(f"❌ Failed to list CRDs: {e.reason}")
             return False
         
+        installed = {crd["metadata"]["name"] for crd in crds}
         missing = []
         for crd in required_crds:
-            if crd not in result.stdout:
+            if crd not in installed:
                 missing.append(crd)
         
         if missing:
-            print(f"❌ Missing CRDs: {missing}")
+            self.log(f"❌ Missing CRDs: {missing}")
             success = False
         else:
-            print("✅ All required CRDs are installed")
+            self.log("✅ All required CRDs are installed")
             success = True
         
-        self.results.append(("CRDs Installed", success))
+        self.record_result("CRDs Installed", success)
         return success
     
     def check_clusterissuers(self):
         """Verify ClusterIssuers are ready."""
-        print("🔍 Checking ClusterIssuers...")
-        
-        result = self.run_kubectl(["get", "clusterissuer", "-o", "json"])
-        if not result:
-            return False
+        self.log("🔍 Checking ClusterIssuers...")
         
         try:
-            data = json.loads(result.stdout)
-            issuers = data.get("items", [])
+            issuers = self.list_items(
+                self.custom_objects.list_cluster_custom_object,
+                "cert-manager.io", "v1", "clusterissuers", resource_version="0"
+            )
             
             ready_issuers = []
             for issuer in issuers:
@@ -133,97 +195,94 @@ class CertManagerValidator:
                         break
                 
                 if ready:
-                    print(f"✅ ClusterIssuer {name} is ready")
+                    self.log(f"✅ ClusterIssuer {name} is ready")
                     ready_issuers.append(name)
                 else:
-                    print(f"❌ ClusterIssuer {name} is not ready")
+                    self.log(f"❌ ClusterIssuer {name} is not ready")
             
             success = len(ready_issuers) >= 2  # Expecting at least staging and production
-            self.results.append(("ClusterIssuers Ready", success))
+            self.record_result("ClusterIssuers Ready", success)
             return success
             
-        except json.JSONDecodeError:
-            print("❌ Failed to parse ClusterIssuer status")
+        except ApiException as e:
+            self.log(f"❌ Failed to list ClusterIssuers: {e.reason}")
             return False
     
     def check_workload_identity(self):
         """Verify Azure Workload Identity configuration."""
-        print("🔍 Checking Azure Workload Identity configuration...")
+        self.log("🔍 Checking Azure Workload Identity configuration...")
         
         # Check service account annotations
-        result = self.run_kubectl(["get", "serviceaccount", "cert-manager", "-n", self.namespace, "-o", "json"])
-        if not result:
-            return False
-        
         try:
-            data = json.loads(result.stdout)
-            annotations = data.get("metadata", {}).get("annotations", {})
-            labels = data.get("metadata", {}).get("labels", {})
+            response = self.core_v1.read_namespaced_service_account(
+                "cert-manager", self.namespace, _preload_content=False
+            )
+            service_account = orjson.loads(response.data)
+            
+            annotations = service_account["metadata"].get("annotations", {})
+            labels = service_account["metadata"].get("labels", {})
             
             # Check for workload identity annotation
             client_id_annotation = annotations.get("azure.workload.identity/client-id")
             workload_label = labels.get("azure.workload.identity/use")
             
             if client_id_annotation == self.client_id:
-                print(f"✅ Service account has correct client ID: {client_id_annotation}")
+                self.log(f"✅ Service account has correct client ID: {client_id_annotation}")
             else:
-                print(f"❌ Service account client ID mismatch. Expected: {self.client_id}, Got: {client_id_annotation}")
+                self.log(f"❌ Service account client ID mismatch. Expected: {self.client_id}, Got: {client_id_annotation}")
                 return False
             
             if workload_label == "true":
-                print("✅ Service account has workload identity label")
+                self.log("✅ Service account has workload identity label")
             else:
-                print(f"❌ Service account missing workload identity label")
+                self.log(f"❌ Service account missing workload identity label")
                 return False
             
             success = True
-            self.results.append(("Workload Identity Config", success))
+            self.record_result("Workload Identity Config", success)
             return success
             
-        except json.JSONDecodeError:
-            print("❌ Failed to parse service account configuration")
+        except ApiException as e:
+            if e.status == 404:
+                self.log(f"❌ Service account cert-manager not found in {self.namespace}")
+            else:
+                self.log(f"❌ Failed to read service account configuration: {e.reason}")
             return False
     
     def check_azure_permissions(self):
         """Verify Azure DNS permissions."""
-        print("🔍 Checking Azure DNS permissions...")
+        self.log("🔍 Checking Azure DNS permissions...")
         
         # List DNS TXT records to verify permissions
-        result = self.run_az([
-            "network", "dns", "record-set", "txt", "list",
-            "--zone-name", self.dns_zone,
-            "--resource-group", "dns",
-            "--query", "[?contains(name, 'acme-challenge')].name",
-            "-o", "json"
-        ])
+        try:
+            record_sets = self._dns.record_sets.list_by_type(
+                resource_group_name=self.dns_resource_group,
+                zone_name=self.dns_zone,
+                record_type="TXT",
+            )
+            records = [rs.name for rs in record_sets if "acme-challenge" in rs.name]
+        except AzureError as e:
+            self.log("❌ Cannot access Azure DNS zone - check permissions")
+            self.log(f"   Error: {e}")
+            return False
         
-        if result and result.returncode == 0:
-            try:
-                records = json.loads(result.stdout)
-                if records:
-                    print(f"✅ Found {len(records)} ACME challenge records in DNS zone")
-                    print(f"   Records: {records}")
-                else:
-                    print("ℹ️ No ACME challenge records found (this is normal if no certificates are being issued)")
-                
-                success = True
-                self.results.append(("Azure DNS Permissions", success))
-                return success
-                
-            except json.JSONDecodeError:
-                print("❌ Failed to parse DNS records")
-                return False
+        if records:
+            self.log(f"✅ Found {len(records)} ACME challenge records in DNS zone")
+            self.log(f"   Records: {records}")
         else:
-            print("❌ Cannot access Azure DNS zone - check permissions")
-            return False
+            self.log("ℹ️ No ACME challenge records found (this is normal if no certificates are being issued)")
+        
+        success = True
+        self.record_result("Azure DNS Permissions", success)
+        return success
     
     def test_certificate_issuance(self, timeout_seconds=300):
         """Test certificate issuance with staging issuer."""
-        print("🧪 Testing certificate issuance...")
+        self.log("🧪 Testing certificate issuance...")
         
         # Create a test certificate
         test_name = f"test-cert-{int(time.time())}"
-        cert_yaml = {
+        certificate = {
             "apiVersion": "cert-manager.io/v1",
             "kind": "Certificate",
             "metadata": {
@@ -240,52 +299,94 @@ class CertManagerValidator:
             }
         }
         
-        # Apply certificate
-        with open(f"/tmp/{test_name}.yaml", "w") as f:
-            yaml.dump(cert_yaml, f)
-        
-        apply_result = self.run_kubectl(["apply", "-f", f"/tmp/{test_name}.yaml"])
-        if not apply_result:
+        # Create certificate
+        try:
+            self.custom_objects.create_namespaced_custom_object(
+                "cert-manager.io", "v1", "default", "certificates", certificate
+            )
+        except ApiException as e:
+            self.log(f"❌ Failed to create test certificate: {e.reason}")
             return False
         
-        print(f"✅ Created test certificate: {test_name}")
+        self.log(f"✅ Created test certificate: {test_name}")
+        
+        # The certificate is created from the dict above, so nothing touches
+        # disk; always remove it, even if the watch is interrupted
+        try:
+            success = self.wait_for_certificate(test_name, timeout_seconds)
+        finally:
+            self.delete_test_certificate(test_name)
         
-        # Wait for certificate to be ready
+        self.record_result("Certificate Issuance Test", success)
+        return success
+    
+    def wait_for_certificate(self, test_name, timeout_seconds):
+        """Watch the test certificate until it is Ready, fails, or times out."""
+        # Watch the certificate so readiness is seen as soon as cert-manager
+        # writes it, rather than on the next polling tick. The apiserver may
+        # close a watch early, so reopen it with a capped exponential backoff
         start_time = time.time()
-        while time.time() - start_time < timeout_seconds:
-            result = self.run_kubectl([
-                "get", "certificate", test_name,
-                "-o", "jsonpath={.status.conditions[?(@.type=='Ready')].status}"
-            ])
-            
-            if result and result.stdout.strip() == "True":
-                elapsed = time.time() - start_time
-                print(f"✅ Certificate issued successfully in {elapsed:.1f} seconds")
+        deadline = start_time + timeout_seconds
+        last_message = "No Ready condition reported"
+        delay = 1.0
+        while time.time() < deadline:
+            w = watch.Watch()
+            for event in w.stream(
+                self.custom_objects.list_namespaced_custom_object,
+                group="cert-manager.io",
+                version="v1",
+                namespace="default",
+                plural="certificates",
+                field_selector=f"metadata.name={test_name}",
+                resource_version="0",
+                timeout_seconds=max(1, int(deadline - time.time())),
+            ):
+                status = event["object"].get("status", {})
+                conditions = status.get("conditions", [])
                 
-                # Cleanup
-                self.run_kubectl(["delete", "certificate", test_name], check=False)
+                # Structured failure signals replace scanning `kubectl describe` output
+                failed_condition = next(
+                    (c for c in conditions
+                     if c["status"] == "False" and c.get("reason") in ("Failed", "IssuanceFailed")),
+                    None
+                )
+                if failed_condition or status.get("lastFailureTime"):
+                    w.stop()
+                    self.log("❌ Certificate issuance failed:")
+                    if failed_condition:
+                        self.log(f"   {failed_condition['reason']}: {failed_condition.get('message', '')}")
+                    else:
+                        self.log(f"   Last failure at {status['lastFailureTime']}")
+                    return False
                 
-                success = True
-                self.results.append(("Certificate Issuance Test", success))
-                return success
-            
-            # Check for errors
-            cert_status = self.run_kubectl(["describe", "certificate", test_name])
-            if cert_status and "Error" in cert_status.stdout:
-                print("❌ Certificate issuance failed:")
-                print(cert_status.stdout)
-                break
+                ready_condition = next((c for c in conditions if c["type"] == "Ready"), None)
+                if ready_condition is None:
+                    continue
+                
+                if ready_condition["status"] == "True":
+                    w.stop()
+                    elapsed = time.time() - start_time
+                    self.log(f"✅ Certificate issued successfully in {elapsed:.1f} seconds")
+                    return True
+                
+                last_message = ready_condition.get("message", last_message)
             
-            time.sleep(10)
-        
-        print(f"❌ Certificate issuance timed out after {timeout_seconds} seconds")
+            time.sleep(min(delay, max(0, deadline - time.time())))
+            delay = min(delay * 1.5, 15)
         
-        # Cleanup
-        self.run_kubectl(["delete", "certificate", test_name], check=False)
-        
-        self.results.append(("Certificate Issuance Test", False))
+        self.log(f"❌ Certificate issuance timed out after {timeout_seconds} seconds")
+        self.log(f"   Last status: {last_message}")
         return False
     
+    def delete_test_certificate(self, test_name):
+        """Delete the test certificate, ignoring it if already gone."""
+        try:
+            self.custom_objects.delete_namespaced_custom_object(
+                "cert-manager.io", "v1", "default", "certificates", test_name
+            )
+        except ApiException:
+            pass
+    
     def generate_summary(self):
         """Generate validation summary."""
         print("\n" + "="*60)
@@ -330,17 +431,33 @@ class CertManagerValidator:
             # ("Certificate Issuance", self.test_certificate_issuance)  # Optional - can take 5+ minutes
         ]
         
-        for name, check_func in checks:
-            print(f"\n📌 Running: {name}")
-            try:
-                check_func()
-            except Exception as e:
-                print(f"❌ Check failed with exception: {e}")
-                self.results.append((name, False))
+        self.prewarm_azure_token()
+        
+        # Checks are independent, so run them concurrently and print each
+        # check's buffered output as a block in completion order
+        with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+            futures = [executor.submit(self.run_check, name, check_func) for name, check_func in checks]
+            for future in as_completed(futures):
+                print("\n".join(future.result()))
         
         return self.generate_summary()
+    
+    def run_check(self, name, check_func):
+        """Run a single check, returning its buffered output lines."""
+        self._output.lines = [f"\n📌 Running: {name}"]
+        try:
+            check_func()
+        except Exception as e:
+            self.log(f"❌ Check failed with exception: {e}")
+            self.record_result(name, False)
+        finally:
+            lines, self._output.lines = self._output.lines, None
+        return lines
 
 if __name__ == "__main__":
     validator = CertManagerValidator()
-    success = validator.run_all_validations()
+    try:
+        success = validator.run_all_validations()
+    finally:
+        validator.close()
     sys.exit(0 if success else 1)
\ No newline at end of file
@@ -3,6 +3,11 @@
 ASO Stack Deployment with Enhanced Memory Learning
 This script deploys Azure Service Operator resources with continuous memory updates
 for learning and optimization.
+
+Resources are applied with kubectl and monitored through the Kubernetes Python
+client using your current kubeconfig context:
+
+    pip install kubernetes orjson pyyaml
 """
 
 import subprocess
@@ -10,9 +15,51 @@ import json
 import time
 import sys
 import yaml
+import orjson
 import os
+import shutil
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
 from pathlib import Path
+from kubernetes import client, config, watch
+from kubernetes.client.rest import ApiException
+from urllib3.exceptions import HTTPError
+
+# libyaml's C loader parses the same input several times faster than the
+# pure-Python one; fall back when PyYAML was built without libyaml
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Stack dependency DAG keyed by resource type; independent branches deploy concurrently
+RESOURCE_DEPENDENCIES = {
+    "resourcegroup": [],
+    "identity": ["resourcegroup"],
+    "roleassignment": ["identity"],
+    "cluster": ["identity", "roleassignment"],
+    "federated": ["cluster"],
+    "extension": ["cluster"],
+    "fluxconfiguration": ["extension"]
+}
+
+# Plural resource names for the stack's kinds; English plurals can't be derived
+# by appending "s" (UserAssignedIdentity -> userassignedidentities). Other kinds
+# are looked up through API discovery.
+KIND_PLURALS = {
+    "ResourceGroup": "resourcegroups",
+    "UserAssignedIdentity": "userassignedidentities",
+    "RoleAssignment": "roleassignments",
+    "ManagedCluster": "managedclusters",
+    "FederatedIdentityCredential": "federatedidentitycredentials",
+    "Extension": "extensions",
+    "FluxConfiguration": "fluxconfigurations"
+}
+
+@functools.lru_cache(maxsize=32)
+def _parse_stack_file(path):
+    """Parse a multi-document YAML file once and memoize the documents."""
+    with open(path, 'r') as f:
+        return tuple(yaml.load_all(f, Loader=YAML_LOADER))
 
 class ASODeployerWithEnhancedMemory:
     def __init__(self):
@@ -30,11 +77,32 @@ class ASODeployerWithEnhancedMemory:
             "fluxconfiguration.yaml"
         ]
         self.deployment_results = []
+        self._results_lock = threading.Lock()
+        self._output = threading.local()
+        
+        # Absolute path lets subprocess use posix_spawn instead of fork+exec
+        self.kubectl_path = shutil.which("kubectl") or "kubectl"
+        
+        # Shared API client for watching ASO resource status
+        config.load_kube_config()
+        self.custom_objects = client.CustomObjectsApi()
+        self._discovered_plurals = {}
+        
+        # Parse every stack file once up front; deploy and monitor phases read from here
+        self.stack = self.load_stack()
         
     def log_with_timestamp(self, message):
         """Log message with timestamp."""
         timestamp = datetime.now().strftime("%H:%M:%S")
-        print(f"[{timestamp}] {message}")
+        self.log(f"[{timestamp}] {message}")
+    
+    def log(self, message=""):
+        """Print message, or buffer it when running inside a concurrent deployment phase."""
+        lines = getattr(self._output, "lines", None)
+        if lines is None:
+            print(message)
+        else:
+            lines.append(message)
         
     def store_issue_immediately(self, resource_type, issue_data):
         """Store issues in memory immediately for fast learning."""
@@ -79,48 +147,55 @@ class ASODeployerWithEnhancedMemory:
         # return mcp__memory-aso__search_nodes(query=query_pattern)
         return {"entities": [], "relations": []}
     
-    def run_kubectl_command(self, cmd_args):
+    def run_kubectl_command(self, cmd_args, stdin=None):
         """Execute kubectl command and return result."""
-        cmd = ["kubectl"] + cmd_args
-        result = subprocess.run(cmd, capture_output=True, text=True)
+        cmd = [self.kubectl_path] + cmd_args
+        # close_fds=False keeps CPython on its posix_spawn fast path, which
+        # avoids duplicating the parent's page tables for every kubectl call
+        result = subprocess.run(cmd, input=stdin, capture_output=True, text=True, close_fds=False)
         return result
     
+    def apply_resource_files(self, resource_files):
+        """Apply several resource files with a single `kubectl apply -f -` call."""
+        manifests = []
+        for resource_file in resource_files:
+            with open(f"{self.stack_dir}/{resource_file}", 'r') as f:
+                manifests.append(f.read())
+        return self.run_kubectl_command(["apply", "-f", "-"], stdin="\n---\n".join(manifests))
+    
     def check_resource_status(self, resource_type, resource_name, namespace):
         """Check if resource exists and its status."""
         try:
-            cmd_args = ["get", resource_type, resource_name, "-n", namespace, "-o", "yaml"]
+            # JSON is cheaper than YAML for the apiserver to render and for us to parse
+            cmd_args = ["get", resource_type, resource_name, "-n", namespace, "-o", "json"]
             result = self.run_kubectl_command(cmd_args)
             if result.returncode == 0:
-                resource_data = yaml.safe_load(result.stdout)
-                status = resource_data.get('status', {})
-                conditions = status.get('conditions', [])
-                
-                # Look for Ready condition
-                for condition in conditions:
-                    if condition.get('type') == 'Ready':
-                        return condition.get('status') == 'True', condition.get('message', '')
-                
-                return False, "No Ready condition found"
+                return self.get_ready_condition(orjson.loads(result.stdout))
             return False, f"Resource not found: {result.stderr}"
         except Exception as e:
             return False, f"Error checking status: {str(e)}"
     
-    def deploy_resource_with_memory(self, resource_file):
-        """Deploy resource with real-time memory updates."""
-        print(f"\n📦 Deploying {resource_file}...")
+    def deploy_resource_with_memory(self, resource_file, apply_result=None):
+        """Deploy resource with real-time memory updates.
+        
+        apply_result is a successful batched apply that already covered this file.
+        """
+        self.log(f"\n📦 Deploying {resource_file}...")
         
         # Query memory first
-        resource_type = resource_file.replace('.yaml', '')
+        resource_type = self.stack[resource_file]["type"]
         memory_results = self.query_memory_before_action(f"aso {resource_type} issues")
         
         if memory_results.get("entities"):
-            print(f"⚠️  Found {len(memory_results['entities'])} previous issues with {resource_type}")
+            self.log(f"⚠️  Found {len(memory_results['entities'])} previous issues with {resource_type}")
         
         deployment_start = time.time()
         
-        # Apply the resource
-        cmd_args = ["apply", "-f", f"{self.stack_dir}/{resource_file}"]
-        result = self.run_kubectl_command(cmd_args)
+        # Apply the resource, unless it went out in a batched apply
+        result = apply_result
+        if result is None:
+            cmd_args = ["apply", "-f", f"{self.stack_dir}/{resource_file}"]
+            result = self.run_kubectl_command(cmd_args)
         
         deployment_duration = time.time() - deployment_start
         
@@ -131,7 +206,7 @@ class ASODeployerWithEnhancedMemory:
                 "config_summary": f"Standard {resource_type} configuration",
                 "dependencies": ["Previous resources in sequence"]
             })
-            print(f"✅ {resource_file} applied successfully")
+            self.log(f"✅ {resource_file} applied successfully")
             return True
         else:
             # FAILURE: Store issue immediately
@@ -142,15 +217,15 @@ class ASODeployerWithEnhancedMemory:
                 "resolution": "Check YAML syntax and CRD availability",
                 "context": f"Deployment sequence position: {resource_file}"
             })
-            print(f"❌ {resource_file} failed: {result.stderr}")
+            self.log(f"❌ {resource_file} failed: {result.stderr}")
             return False
     
     def monitor_with_memory_updates(self, resource_file):
         """Monitor resource with memory-guided approach."""
-        print(f"📊 Memory-guided monitoring: {resource_file}")
+        self.log(f"📊 Memory-guided monitoring: {resource_file}")
         
         # Query memory for known timing patterns
-        resource_type = resource_file.replace('.yaml', '')
+        resource_type = self.stack[resource_file]["type"]
         timing_query = self.query_memory_before_action(f"aso {resource_type} provisioning time")
         
         # Set timeout based on memory or defaults
@@ -161,51 +236,42 @@ class ASODeployerWithEnhancedMemory:
             expected_time = 600   # 10 minutes for extensions
         
         if timing_query.get("entities"):
-            print(f"📚 Memory: Found previous timing data for {resource_type}")
+            self.log(f"📚 Memory: Found previous timing data for {resource_type}")
         
         monitor_start = time.time()
         
         # Get resource details for monitoring
         resource_details = self.get_resource_details(resource_file)
         if not resource_details:
-            print(f"⚠️  Could not determine resource details for {resource_file}")
+            self.log(f"⚠️  Could not determine resource details for {resource_file}")
             return True
         
-        # Monitoring loop with memory updates
-        last_status = ""
-        while time.time() - monitor_start < expected_time:
-            elapsed = time.time() - monitor_start
-            
-            # Check resource status
-            for rd in resource_details:
-                is_ready, message = self.check_resource_status(
-                    rd['type'], rd['name'], rd['namespace']
-                )
-                
-                if is_ready:
-                    final_duration = time.time() - monitor_start
-                    print(f"  ✅ {rd['name']} ready after {int(final_duration)}s")
-                    
-                    # Store final timing data
-                    self.store_success_pattern(f"{resource_type}-timing", {
-                        "duration": final_duration,
-                        "config_summary": f"Provisioning completed in {int(final_duration)}s",
-                        "dependencies": ["Azure region capacity"]
-                    })
-                    return True
-                else:
-                    current_status = f"{rd['name']}: {message}"
-                    if current_status != last_status:
-                        print(f"  ⏳ {current_status}")
-                        last_status = current_status
-            
-            if elapsed > 120 and elapsed % 60 == 0:  # Log every minute after 2 minutes
-                print(f"  ⏳ Still provisioning... {int(elapsed)}s elapsed")
+        # One watch per (group, version, namespace, plural) instead of polling each resource
+        deadline = monitor_start + expected_time
+        watch_groups = {}
+        for rd in resource_details:
+            key = (rd['group'], rd['version'], rd['namespace'], rd['plural'])
+            watch_groups.setdefault(key, []).append(rd)
+        
+        all_ready = True
+        for key, group_details in watch_groups.items():
+            if not self.watch_until_ready(key, group_details, monitor_start, deadline):
+                all_ready = False
+                break
+        
+        if all_ready:
+            final_duration = time.time() - monitor_start
             
-            time.sleep(30)
+            # Store final timing data
+            self.store_success_pattern(f"{resource_type}-timing", {
+                "duration": final_duration,
+                "config_summary": f"Provisioning completed in {int(final_duration)}s",
+                "dependencies": ["Azure region capacity"]
+            })
+            return True
         
         # If we get here, timeout was reached
-        print(f"⚠️  {resource_type} did not become ready within {expected_time}s")
+        self.log(f"⚠️  {resource_type} did not become ready within {expected_time}s")
         self.store_issue_immediately(f"{resource_type}-timeout", {
             "description": f"{resource_type} provisioning timeout",
             "symptoms": [f"Not ready after {expected_time}s"],
@@ -213,26 +279,138 @@ class ASODeployerWithEnhancedMemory:
         })
         return False
     
+    def watch_until_ready(self, watch_key, resource_details, monitor_start, deadline):
+        """Watch one resource collection until every named resource reports Ready."""
+        group, version, namespace, plural = watch_key
+        pending = {rd['name']: rd for rd in resource_details}
+        last_status = {}
+        poll_delay = 5
+        
+        while pending and time.time() < deadline:
+            w = watch.Watch()
+            reopen_after_backoff = False
+            try:
+                for event in w.stream(
+                    self.custom_objects.list_namespaced_custom_object,
+                    group=group,
+                    version=version,
+                    namespace=namespace,
+                    plural=plural,
+                    resource_version="0",
+                    timeout_seconds=max(1, int(deadline - time.time())),
+                ):
+                    obj = event['object']
+                    name = obj['metadata']['name']
+                    if name not in pending:
+                        continue
+                    
+                    is_ready, message = self.get_ready_condition(obj)
+                    if is_ready:
+                        self.log(f"  ✅ {name} ready after {int(time.time() - monitor_start)}s")
+                        del pending[name]
+                        if not pending:
+                            w.stop()
+                    elif last_status.get(name) != message:
+                        self.log(f"  ⏳ {name}: {message}")
+                        last_status[name] = message
+            except ApiException as e:
+                if e.status == 410:
+                    # Watch expired (410 Gone) - reopen it with a fresh list
+                    self.log(f"  ⚠️  Watch on {plural} expired, reopening")
+                else:
+                    # Watch not available (e.g. RBAC) - fall back to a status poll
+                    self.log(f"  ⚠️  Watch on {plural} failed ({e.reason}), polling status instead")
+                    with ThreadPoolExecutor(max_workers=len(pending)) as pool:
+                        statuses = list(pool.map(
+                            lambda rd: (rd['name'], self.check_resource_status(rd['type'], rd['name'], namespace)),
+                            list(pending.values())
+                        ))
+                    for name, (is_ready, message) in statuses:
+                        if is_ready:
+                            self.log(f"  ✅ {name} ready after {int(time.time() - monitor_start)}s")
+                            del pending[name]
+                        elif last_status.get(name) != message:
+                            self.log(f"  ⏳ {name}: {message}")
+                            last_status[name] = message
+                reopen_after_backoff = True
+            except HTTPError as e:
+                # Connection dropped or read timed out mid-watch - reopen it
+                self.log(f"  ⚠️  Watch on {plural} interrupted ({e}), reopening")
+                reopen_after_backoff = True
+            
+            if reopen_after_backoff and pending:
+                # Back off progressively towards ASO's reconcile cadence
+                time.sleep(min(poll_delay, max(0, deadline - time.time())))
+                poll_delay = min(poll_delay * 1.5, 60)
+        
+        return not pending
+    
+    def get_ready_condition(self, resource):
+        """Return (is_ready, message) from a resource's Ready condition."""
+        for condition in resource.get('status', {}).get('conditions', []):
+            if condition.get('type') == 'Ready':
+                return condition.get('status') == 'True', condition.get('message', '')
+        return False, "No Ready condition found"
+    
+    def load_stack(self):
+        """Map each file in resource_order to its resource type and parsed resource details."""
+        return {
+            resource_file: {
+                "type": resource_file.replace('.yaml', ''),
+                "resources": self.read_resource_details(resource_file)
+            }
+            for resource_file in self.resource_order
+        }
+    
     def get_resource_details(self, resource_file):
+        """Return the cached resource details for a stack file."""
+        if resource_file in self.stack:
+            return self.stack[resource_file]["resources"]
+        return self.read_resource_details(resource_file)
+    
+    def read_resource_details(self, resource_file):
         """Extract resource details from YAML file."""
         file_path = f"{self.stack_dir}/{resource_file}"
         try:
-            with open(file_path, 'r') as f:
-                docs = list(yaml.safe_load_all(f))
+            docs = _parse_stack_file(file_path)
             
             resources = []
             for doc in docs:
                 if doc and doc.get('kind'):
+                    group, _, version = doc['apiVersion'].rpartition('/')
                     resources.append({
                         'type': doc['kind'].lower(),
+                        'group': group,
+                        'version': version,
+                        'plural': self.resource_plural(group, version, doc['kind']),
                         'name': doc['metadata']['name'],
                         'namespace': doc['metadata'].get('namespace', 'default')
                     })
             return resources
         except Exception as e:
-            print(f"Error reading {resource_file}: {e}")
+            self.log(f"Error reading {resource_file}: {e}")
             return []
     
+    def resource_plural(self, group, version, kind):
+        """Return the plural resource name for a kind, via API discovery if it isn't known."""
+        if kind in KIND_PLURALS:
+            return KIND_PLURALS[kind]
+        
+        key = (group, version, kind)
+        if key not in self._discovered_plurals:
+            try:
+                if group:
+                    resource_list = self.custom_objects.get_api_resources(group, version)
+                else:
+                    resource_list = client.CoreV1Api(self.custom_objects.api_client).get_api_resources()
+                plural = next(r.name for r in resource_list.resources
+                              if r.kind == kind and '/' not in r.name)
+            except (ApiException, HTTPError, StopIteration) as e:
+                plural = f"{kind.lower()}s"
+                self.log(f"⚠️  Could not discover plural for {kind} in {group}/{version} ({e}), assuming {plural}")
+            self._discovered_plurals[key] = plural
+        return self._discovered_plurals[key]
+    
     def run_memory_guided_deployment(self):
         """Execute complete deployment with continuous memory learning."""
         print("🚀 ASO Deployment with Enhanced Memory Learning")
@@ -241,12 +419,74 @@ class ASODeployerWithEnhancedMemory:
         # Initial memory query
         self.query_memory_before_action(f"aso {self.cluster_name} deployment")
         
-        for resource_file in self.resource_order:
-            print(f"\n{'=' * 50}")
-            print(f"PHASE: {resource_file}")
+        # Walk the dependency DAG, starting each phase once all of its
+        # dependencies have deployed and become ready
+        pending = list(self.resource_order)
+        succeeded, failed = set(), set()
+        running = {}
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            while pending or running:
+                ready = []
+                for resource_file in list(pending):
+                    resource_type = self.stack[resource_file]["type"]
+                    deps = [f"{dep}.yaml" for dep in RESOURCE_DEPENDENCIES.get(resource_type, [])
+                            if f"{dep}.yaml" in self.resource_order]
+                    
+                    if any(dep in failed for dep in deps):
+                        pending.remove(resource_file)
+                        failed.add(resource_file)
+                        self.record_deployment_result(resource_file, False, False)
+                        print(f"\n⏭️  Skipping {resource_file} - dependencies failed: {[d for d in deps if d in failed]}")
+                    elif all(dep in succeeded for dep in deps):
+                        pending.remove(resource_file)
+                        ready.append(resource_file)
+                
+                # Files unblocked together go out in one apply so the apiserver
+                # admits them in a single request; on failure each file is
+                # applied on its own so errors are attributed correctly
+                apply_result = None
+                if len(ready) > 1:
+                    print(f"\n📦 Applying {', '.join(ready)} in a single request...")
+                    batch_result = self.apply_resource_files(ready)
+                    if batch_result.returncode == 0:
+                        apply_result = batch_result
+                
+                # Buffer output only while phases overlap; a phase running on its
+                # own (e.g. the long cluster monitor) streams progress live
+                buffered = len(ready) + len(running) > 1
+                for resource_file in ready:
+                    future = executor.submit(self.run_deployment_phase, resource_file, apply_result, buffered)
+                    running[future] = resource_file
+                
+                if not running:
+                    break
+                
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    resource_file = running.pop(future)
+                    phase_success, lines = future.result()
+                    if lines:
+                        print("\n".join(lines))
+                    (succeeded if phase_success else failed).add(resource_file)
+        
+        # Store complete deployment summary
+        self.store_deployment_summary()
+        
+        success_count = sum(1 for r in self.deployment_results if r["deployed"])
+        return success_count == len(self.resource_order)
+    
+    def run_deployment_phase(self, resource_file, apply_result=None, buffered=False):
+        """Deploy and monitor one resource file, returning (success, buffered log lines).
+        
+        Unbuffered phases print as they go and return None for the lines.
+        """
+        self._output.lines = [] if buffered else None
+        try:
+            self.log(f"\n{'=' * 50}")
+            self.log(f"PHASE: {resource_file}")
             
             # Deploy with memory
-            deploy_success = self.deploy_resource_with_memory(resource_file)
+            deploy_success = self.deploy_resource_with_memory(resource_file, apply_result)
             
             if deploy_success:
                 # Monitor with memory (skip for immediate resources)
@@ -254,28 +494,24 @@ class ASODeployerWithEnhancedMemory:
                     monitor_success = self.monitor_with_memory_updates(resource_file)
                 else:
                     monitor_success = True
-                    print(f"  ✅ {resource_file} - no monitoring needed")
-                
-                self.deployment_results.append({
-                    "resource": resource_file,
-                    "deployed": deploy_success,
-                    "monitored": monitor_success
-                })
+                    self.log(f"  ✅ {resource_file} - no monitoring needed")
             else:
-                self.deployment_results.append({
-                    "resource": resource_file,
-                    "deployed": False,
-                    "monitored": False
-                })
-                
-                print(f"❌ {resource_file} failed - check memory for resolution patterns")
-                # Don't break on failure, continue with other resources
-        
-        # Store complete deployment summary
-        self.store_deployment_summary()
-        
-        success_count = sum(1 for r in self.deployment_results if r["deployed"])
-        return success_count == len(self.resource_order)
+                monitor_success = False
+                self.log(f"❌ {resource_file} failed - check memory for resolution patterns")
+            
+            self.record_deployment_result(resource_file, deploy_success, monitor_success)
+            return deploy_success and monitor_success, self._output.lines
+        finally:
+            self._output.lines = None
+    
+    def record_deployment_result(self, resource_file, deployed, monitored):
+        """Record a phase result; safe to call from worker threads."""
+        with self._results_lock:
+            self.deployment_results.append({
+                "resource": resource_file,
+                "deployed": deployed,
+                "monitored": monitored
+            })
     
     def store_deployment_summary(self):
         """Store complete deployment summary in memory."""